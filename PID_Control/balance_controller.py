@@ -168,7 +168,10 @@ class BalanceController:
                         'pid': {
                             'p_gain': config.get('P_GAIN', 0),
                             'i_gain': config.get('I_GAIN', 0),
-                            'd_gain': config.get('D_GAIN', 0)
+                            'd_gain': config.get('D_GAIN', 0),
+                            'p_term': self.pid.p_term,
+                            'i_term': self.pid.i_term,
+                            'd_term': self.pid.d_term
                         }
                     }
                     debug_callback(debug_info)
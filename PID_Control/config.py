@@ -42,6 +42,8 @@ Example Usage:
 
 import json
 import os
+import stat
+import threading
 
 # File path for the configuration
 CONFIG_FILE = 'robot_config.json'
@@ -89,21 +91,58 @@ DEFAULT_CONFIG = {
 }
 
 
+# (file key, parsed config) of the last read or save, replaced as one tuple so
+# a reader never pairs a key with another version's config. The key is
+# (st_ino, st_size, st_mtime_ns): mtimes tick coarsely, and the inode and size
+# also change when the file is swapped or rewritten within one tick.
+_config_cache = (None, None)
+_config_cache_lock = threading.Lock()
+
+
+def _file_key(st):
+    """Return the cache key for a stat result of the config file."""
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
 def load_config():
     """
     Load configuration from robot_config.json file or create default if it doesn't exist.
     
+    The parsed file is cached and only re-read when the file changes, so
+    repeated calls cost a single stat().
+    
     Returns:
-        Configuration dictionary
+        Configuration dictionary (a copy that callers may modify)
     """
-    if os.path.exists(CONFIG_FILE):
+    global _config_cache
+    
+    try:
+        key = _file_key(os.stat(CONFIG_FILE))
+    except OSError:
+        key = None
+    
+    if key is not None:
+        # The control loop calls this every cycle; only parse the file again
+        # when it has changed since the last read
+        cached_key, cached_config = _config_cache
+        if key == cached_key:
+            return dict(cached_config)
         try:
             with open(CONFIG_FILE, 'r') as file:
+                # Key the cache on the file actually opened
+                key = _file_key(os.fstat(file.fileno()))
                 config = json.load(file)
-                return config
+            with _config_cache_lock:
+                _config_cache = (key, config)
+            return dict(config)
         except (json.JSONDecodeError, IOError) as e:
             print(f"⚠️ Error loading configuration: {e}")
             print("Using default configuration instead.")
+            if isinstance(e, json.JSONDecodeError):
+                # Remember the defaults for this version of the file, so a
+                # corrupt config is not re-parsed (and reported) every cycle
+                with _config_cache_lock:
+                    _config_cache = (key, DEFAULT_CONFIG)
             return DEFAULT_CONFIG.copy()
     else:
         # Create the default config file if it doesn't exist
@@ -111,17 +150,81 @@ def load_config():
         return DEFAULT_CONFIG.copy()
 
 
-def save_config(config):
+def _write_config_file(data):
+    """
+    Replace the config file's contents with data.
+    
+    The text goes to a temporary file that is then swapped in, so the control
+    loop never reads a half-written config. The temporary file takes over the
+    old file's permissions and owner (users may have made it world-writable
+    for the dashboard). If the directory is not writable, the file is
+    rewritten in place instead.
+    
+    Returns:
+        os.stat_result of the written file
+    """
+    temp_file = CONFIG_FILE + '.tmp'
+    try:
+        file = open(temp_file, 'w')
+    except OSError:
+        with open(CONFIG_FILE, 'w') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+            return os.fstat(file.fileno())
+    
+    try:
+        with file:
+            file.write(data)
+            file.flush()
+            # On disk before the swap, so a power cut (the robot runs on a
+            # battery) leaves either the old or the new config, never an
+            # empty file
+            os.fsync(file.fileno())
+            written = os.fstat(file.fileno())
+        try:
+            st = os.stat(CONFIG_FILE)
+        except FileNotFoundError:
+            st = None
+        if st is not None:
+            os.chmod(temp_file, stat.S_IMODE(st.st_mode))
+            try:
+                os.chown(temp_file, st.st_uid, st.st_gid)
+            except OSError:
+                # Only root can hand the file to another user
+                pass
+        os.replace(temp_file, CONFIG_FILE)
+        return written
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+
+
+def save_config(config, quiet=False):
     """
     Save configuration to file.
     
     Args:
         config: Configuration dictionary to save
+        quiet: Don't print a message on success (for frequent saves)
     """
+    global _config_cache
+    
     try:
-        with open(CONFIG_FILE, 'w') as file:
-            json.dump(config, file, indent=4)
-        print(f"✅ Configuration saved to {CONFIG_FILE}")
+        # Encode before touching the file, so a bad value cannot leave a
+        # truncated config behind
+        data = json.dumps(config, indent=4)
+        written = _write_config_file(data)
+        # Seed the load_config() cache with what was just written (decoded
+        # from the same text, so it matches a fresh read) instead of
+        # invalidating it and parsing the file again on the next call
+        with _config_cache_lock:
+            _config_cache = (_file_key(written), json.loads(data))
+        if not quiet:
+            print(f"✅ Configuration saved to {CONFIG_FILE}")
     except IOError as e:
         print(f"⚠️ Error saving configuration: {e}")
 
@@ -67,7 +67,9 @@ def web_dashboard_mode(balance_controller):
         roll = debug_info['roll']
         output = debug_info['output']
         angular_velocity = debug_info['angular_velocity']
-        web_dashboard.update_angle_data(roll, output, angular_velocity)
+        pid = debug_info['pid']
+        web_dashboard.update_angle_data(roll, output, angular_velocity,
+                                        pid['p_term'], pid['i_term'], pid['d_term'])
     
     try:
         # Start balancing with the dashboard callback
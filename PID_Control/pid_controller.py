@@ -35,6 +35,11 @@ class PIDController:
         self.prev_error = 0.0
         self.integral = 0.0
         
+        # Terms from the last compute() call, for the dashboard
+        self.p_term = 0.0
+        self.i_term = 0.0
+        self.d_term = 0.0
+        
     def compute(self, current_value, dt):
         """
         Compute PID control value based on current value and time delta.
@@ -86,11 +91,19 @@ class PIDController:
         # Store current error for next iteration
         self.prev_error = error
         
+        # Keep the individual terms for the dashboard
+        self.p_term = p_term
+        self.i_term = i_term
+        self.d_term = d_term
+        
         return output
     
     def reset(self):
         """Reset the PID controller state."""
         self.prev_error = 0.0
         self.integral = 0.0
+        self.p_term = 0.0
+        self.i_term = 0.0
+        self.d_term = 0.0
     
 
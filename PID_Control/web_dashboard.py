@@ -9,1008 +9,438 @@ It uses Flask for the web server and Socket.IO for real-time data transmission.
 """
 
 import os
-import json
+import hashlib
+import queue
+import socket
 import threading
 import time
 import numpy as np
-import copy
-from flask import Flask, render_template_string, request, jsonify
-from flask_socketio import SocketIO
-from config import load_config, save_config, DEFAULT_CONFIG
+from flask import Flask, render_template, request, url_for, make_response
+from flask_socketio import SocketIO, join_room
+from config import load_config, save_config, DEFAULT_CONFIG, CONFIG_FILE
+
+# Response compression is optional; the dashboard still works without it
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# orjson is optional too; it replaces the stdlib json encoder for Socket.IO
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class OrjsonModule:
+    """Minimal json-module interface backed by orjson, for Socket.IO packets."""
+    
+    @staticmethod
+    def dumps(obj, **kwargs):
+        # Socket.IO passes stdlib-only options such as separators; orjson
+        # always writes compact output, so they can be ignored. NumPy scalars
+        # and arrays are serialized natively; anything else orjson cannot
+        # handle goes through convert_numpy_to_python.
+        return orjson.dumps(
+            obj,
+            default=convert_numpy_to_python,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    
+    @staticmethod
+    def loads(data, **kwargs):
+        return orjson.loads(data)
 
 # Initialize Flask and SocketIO
 app = Flask(__name__)
-socketio = SocketIO(app, async_mode='threading')
+if Compress is not None:
+    # gzip/brotli the dashboard page (~40KB of HTML with inline CSS/JS)
+    Compress(app)
+
+# Telemetry is small, frequent and mostly float binary, which barely
+# compresses; skip the zlib pass on long-polling responses (WebSocket
+# compression is turned off in tcp_nodelay_middleware)
+socketio_options = {'http_compression': False}
+if orjson is not None:
+    socketio_options['json'] = OrjsonModule
+# The balance loop runs in this process, so the server stays on real threads
+# instead of monkey-patched green threads; with simple-websocket installed,
+# threading mode still upgrades clients from long-polling to WebSocket
+socketio = SocketIO(app, async_mode='threading', **socketio_options)
+
+def tcp_nodelay_middleware(wsgi_app):
+    """
+    Wrap a WSGI app so each request's connection has Nagle's algorithm off
+    and WebSocket upgrades don't negotiate compression.
+    """
+    def middleware(environ, start_response):
+        # simple-websocket always accepts permessage-deflate when the browser
+        # offers it, deflating every frame; it rebuilds the handshake from
+        # the HTTP_* environ keys, so hiding the offer keeps frames raw
+        environ.pop('HTTP_SEC_WEBSOCKET_EXTENSIONS', None)
+        
+        # Small telemetry frames should leave immediately instead of waiting
+        # to be coalesced; Werkzeug exposes the connection socket here
+        sock = environ.get('werkzeug.socket')
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
+        return wsgi_app(environ, start_response)
+    return middleware
+
+# Outermost, so it also sees the Socket.IO requests handled by Engine.IO
+app.wsgi_app = tcp_nodelay_middleware(app.wsgi_app)
 
 # Global variables for data
+# Newest complete sample as an immutable tuple in HISTORY_FIELDS order
+# (time relative to history_start_time first). The producer publishes a new
+# tuple with a single assignment, so send_data always reads one consistent
+# sample without taking a lock, however fast the control loop runs.
+latest_sample = (0.0,) * 7
+
+# Every writer stores native Python floats, so emits need no NumPy conversion
 latest_data = {
     'timestamp': time.time(),
-    'angle': 0,
-    'target_angle': 0,
-    'output': 0,
+    'angle': 0.0,
+    'target_angle': 0.0,
+    'output': 0.0,
     'pid': {
-        'p_term': 0,
-        'i_term': 0,
-        'd_term': 0
+        'p_term': 0.0,
+        'i_term': 0.0,
+        'd_term': 0.0
     }
 }
 
+# Fields of latest_data the dashboard uses; the wall-clock timestamp is
+# only kept for reference and is not sent
+_EMIT_KEYS = ('angle', 'target_angle', 'output', 'pid')
+
+# Third-party scripts used by the dashboard page. A local copy in
+# static/vendor/ is served when present (no DNS/TLS round-trips to the CDNs,
+# works without internet access); otherwise the CDN URL is used.
+VENDOR_SCRIPTS = {
+    'socket.io.min.js': 'https://cdn.socket.io/4.6.0/socket.io.min.js',
+    'chart.umd.js': 'https://cdn.jsdelivr.net/npm/chart.js',
+    'hammer.min.js': 'https://cdn.jsdelivr.net/npm/hammerjs@2.0.8',
+    'chartjs-plugin-zoom.min.js': 'https://cdn.jsdelivr.net/npm/chartjs-plugin-zoom@1.2.1',
+}
+
+# Telemetry pacing: emit at most every EMIT_INTERVAL seconds while new data
+# arrives, and at least every IDLE_EMIT_INTERVAL seconds otherwise
+EMIT_INTERVAL = 0.05
+IDLE_EMIT_INTERVAL = 1.0
+
+# Every recorded sample is sent to the dashboard, drained from the history
+# ring each tick and emitted every TELEMETRY_BATCH_SIZE ticks as one binary
+# message (see encode_frame), one entry per sample per field. Only send_data
+# touches the pending list.
+TELEMETRY_BATCH_SIZE = 5
+telemetry_pending = []
+
+# Samples where no value moved by more than TELEMETRY_EPSILON since the last
+# queued one are not sent; a heartbeat sample still goes out at least every
+# IDLE_EMIT_INTERVAL so clients can tell a still robot from a dead link
+TELEMETRY_EPSILON = 1e-3
+telemetry_last_values = None
+telemetry_last_emit = 0.0
+
+# Set whenever latest_data changes; send_data waits on it
+data_ready = threading.Event()
+
+# Session ids of connected dashboard clients
+connected_clients = set()
+
+# Telemetry rooms, chosen with the ?sub= connection query. 'full' clients
+# (the dashboard) get every HISTORY_FIELDS column; 'angle' clients such as
+# overview pages or status displays only get the first ANGLE_FIELD_COUNT
+# columns (time, angle, target_angle, output) and no PID terms.
+TELEMETRY_ROOMS = ('full', 'angle')
+ANGLE_FIELD_COUNT = 4
+telemetry_subscribers = {room: set() for room in TELEMETRY_ROOMS}
+
+# Print every joystick-driven update (these arrive at display frame rate)
+DEBUG_JOYSTICK = False
+
 # Flag to track if the server is running
 server_running = False
 server_thread = None
 
-# Use a lock for config file operations to prevent corruption
-config_lock = threading.Lock()
+# Use a lock for config file operations to prevent corruption. Hold it
+# across a whole load-modify-save so concurrent updates are not lost
+# (reentrant, as safe_load_config/safe_save_config take it again).
+config_lock = threading.RLock()
+
+# (P, I, D, MAX_I_TERM) used to estimate PID terms; see on_config_change
+estimate_gains = None
+
+# (angle, reply) target angle saves waiting for config_writer.
+# reply is None for streamed joystick updates, or a queue that receives the
+# save result for acknowledged ones.
+target_angle_saves = queue.Queue()
+
+# Longest an acknowledged target angle update waits for its save
+TARGET_SAVE_TIMEOUT = 5.0
+
+# Whether the config_writer task has been started
+config_writer_started = False
+
+# Recent telemetry kept as one row per sample, so (re)connecting clients can
+# fill their charts in a single binary message. float64, so the time column
+# keeps millisecond steps however long the server runs.
+HISTORY_FIELDS = ('time', 'angle', 'target_angle', 'output', 'p_term', 'i_term', 'd_term')
+HISTORY_LENGTH = 100  # Matches maxDataPoints on the dashboard
+# The ring has one spare slot: the balance loop writes sample n into slot
+# n % HISTORY_RING, which never holds any of the last HISTORY_LENGTH
+# published samples, so readers can copy them without taking a lock
+HISTORY_RING = HISTORY_LENGTH + 1
+history = np.zeros((HISTORY_RING, len(HISTORY_FIELDS)), dtype=np.float64)
+history_total = 0  # Samples published since start, including overwritten ones
+# get_history_bytes() results by field count, as (history_total, bytes)
+history_bytes_cache = {}
+history_start_time = time.monotonic()  # Sample times are relative to this
+
+def _convert_dict(obj):
+    return {k: convert_numpy_to_python(v) for k, v in obj.items()}
+
+def _convert_sequence(obj):
+    return [convert_numpy_to_python(i) for i in obj]
+
+# Converters keyed on the exact type, so the common cases cost one lookup
+_CONVERTERS = {
+    np.int32: int,
+    np.int64: int,
+    np.float32: float,
+    np.float64: float,
+    np.ndarray: np.ndarray.tolist,
+    dict: _convert_dict,
+    list: _convert_sequence,
+    tuple: _convert_sequence,
+}
 
 # Helper function to convert NumPy values to Python types
 def convert_numpy_to_python(obj):
     """Convert NumPy types to standard Python types for JSON serialization."""
-    if isinstance(obj, (np.integer, np.int32, np.int64)):
+    converter = _CONVERTERS.get(type(obj))
+    if converter is not None:
+        return converter(obj)
+    
+    # Subclasses and the less common NumPy scalar types
+    if isinstance(obj, np.integer):
         return int(obj)
-    elif isinstance(obj, (np.floating, np.float32, np.float64)):
+    elif isinstance(obj, np.floating):
         return float(obj)
     elif isinstance(obj, np.ndarray):
         return obj.tolist()
     elif isinstance(obj, dict):
-        return {k: convert_numpy_to_python(v) for k, v in obj.items()}
-    elif isinstance(obj, list) or isinstance(obj, tuple):
-        return [convert_numpy_to_python(i) for i in obj]
-    else:
-        return obj
+        return _convert_dict(obj)
+    elif isinstance(obj, (list, tuple)):
+        return _convert_sequence(obj)
+    return obj
 
 # Safe config loading/saving functions
 def safe_load_config():
-    """Thread-safe config loading with fallback"""
+    """
+    Thread-safe config loading with fallback.
+    
+    load_config() only re-parses the file when its modification time changes,
+    so frequent callers cost a single stat(). Returns a copy that callers are
+    free to modify.
+    """
     with config_lock:
         try:
             return load_config()
         except Exception as e:
             print(f"Error loading config: {e}")
-            return copy.deepcopy(DEFAULT_CONFIG)
+            # DEFAULT_CONFIG only holds scalars, so a shallow copy is enough
+            return dict(DEFAULT_CONFIG)
 
-def safe_save_config(config):
-    """Thread-safe config saving"""
+def safe_save_config(config, quiet=False):
+    """
+    Thread-safe config saving.
+    
+    With quiet=True nothing is printed on success, for saves that happen
+    many times a second (joystick target angle updates).
+    """
     with config_lock:
         try:
-            save_config(config)
-            print(f"✅ PID parameters updated and saved: P={config.get('P_GAIN')}, I={config.get('I_GAIN')}, D={config.get('D_GAIN')}")
+            save_config(config, quiet=quiet)
+            # Pages rendered with the old values are stale now
+            _html_cache.clear()
+            on_config_change(config)
+            if not quiet:
+                print(f"✅ PID parameters updated and saved: P={config.get('P_GAIN')}, I={config.get('I_GAIN')}, D={config.get('D_GAIN')}")
             return True
         except Exception as e:
             print(f"❌ Error saving config: {e}, Type: {type(e)}, File: {CONFIG_FILE}")
             print(f"Config data attempted to save: {config}")
             return False
 
-# HTML template with JavaScript for the dashboard
-HTML_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>PID Controller Dashboard</title>
-    <script src="https://cdn.socket.io/4.6.0/socket.io.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/hammerjs@2.0.8"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chartjs-plugin-zoom@1.2.1"></script>
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background-color: #f5f5f5;
-            padding: 20px;
-            margin: 0;
-        }
-        h1 {
-            color: #333;
-            margin-bottom: 20px;
-            font-size: 28px;
-            font-weight: 500;
-            display: inline-block;
-        }
-        .status {
-            float: right;
-            font-size: 16px;
-            margin-top: 10px;
-        }
-        .status-indicator {
-            display: inline-block;
-            padding: 5px 10px;
-            border-radius: 15px;
-            background-color: #4CAF50;
-            color: white;
-            font-weight: 500;
-        }
-        .chart-container {
-            background-color: white;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-            padding: 20px;
-            margin-bottom: 20px;
-            width: 100%;
-            height: 400px; /* Increased height by 15% */
-        }
-        .pid-chart-container {
-            background-color: white;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-            padding: 20px;
-            margin-bottom: 20px;
-            width: 100%;
-            height: 350px; /* Increased height by 15% */
-        }
-        h2 {
-            color: #555;
-            margin-top: 0;
-            margin-bottom: 15px;
-            font-size: 20px;
-            font-weight: 500;
-        }
-        .chart-controls {
-            text-align: center;
-            margin-top: 15px;
-            margin-bottom: 40px; /* Added space between charts and controls */
-            padding-top: 15px; /* Add padding to move reset button down */
-        }
-        .control-panel {
-            display: grid;
-            grid-template-columns: 1fr;
-            gap: 20px;
-            margin-bottom: 20px;
-            margin-top: 40px; /* Moved controls lower */
-        }
-        @media (min-width: 768px) {
-            .control-panel {
-                grid-template-columns: 1fr 1fr;
-            }
-        }
-        .pid-controls, .target-controls {
-            background-color: white;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-            padding: 20px;
-        }
-        .pid-parameter {
-            margin-bottom: 15px;
-            display: flex;
-            align-items: center;
-        }
-        .pid-parameter label {
-            width: 80px;
-            font-weight: 500;
-        }
-        .pid-parameter input {
-            flex: 1;
-            padding: 8px 12px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            font-size: 16px;
-        }
-        .target-angle-display {
-            margin-bottom: 15px;
-            font-size: 18px;
-        }
-        /* Joystick style control */
-        .joystick-container {
-            position: relative;
-            width: 200px;
-            height: 200px;
-            margin: 20px auto;
-            background-color: #f0f0f0;
-            border-radius: 50%;
-            overflow: hidden;
-            touch-action: none;
-            box-shadow: inset 0 0 10px rgba(0,0,0,0.1), 0 4px 8px rgba(0,0,0,0.1);
-        }
-        .joystick-knob {
-            position: absolute;
-            width: 80px;
-            height: 80px;
-            background-color: #2196F3;
-            border-radius: 50%;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            cursor: pointer;
-            box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-            transition: background-color 0.2s;
-        }
-        .joystick-knob:hover {
-            background-color: #0b7dda;
-        }
-        .joystick-center {
-            position: absolute;
-            width: 20px;
-            height: 20px;
-            background-color: #fff;
-            border-radius: 50%;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            pointer-events: none;
-        }
-        .joystick-horizontal-line {
-            position: absolute;
-            width: 100%;
-            height: 2px;
-            background-color: rgba(0,0,0,0.1);
-            top: 50%;
-            left: 0;
-        }
-        .joystick-vertical-line {
-            position: absolute;
-            width: 2px;
-            height: 100%;
-            background-color: rgba(0,0,0,0.1);
-            left: 50%;
-            top: 0;
-        }
-        .joystick-background {
-            position: absolute;
-            width: 100%;
-            height: 100%;
-            background: radial-gradient(circle, #ffffff 0%, #e0e0e0 100%);
-            border-radius: 50%;
-        }
-        .manual-target {
-            display: flex;
-            flex-wrap: wrap;
-            align-items: center;
-            gap: 10px;
-            margin-top: 20px;
-        }
-        .manual-target label {
-            width: 100%;
-            font-weight: 500;
-        }
-        .manual-target input {
-            flex: 1;
-            padding: 8px 12px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            font-size: 16px;
-        }
-        .action-button {
-            padding: 10px 15px;
-            background-color: #4CAF50;
-            color: white;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 16px;
-            transition: background-color 0.2s;
-        }
-        .action-button:hover {
-            background-color: #45a049;
-        }
-        button {
-            padding: 8px 15px;
-            background: #4CAF50;
-            color: white;
-            border: none;
-            border-radius: 4px;
-            cursor: pointer;
-            font-size: 14px;
-            transition: background-color 0.2s;
-        }
-        button:hover {
-            background: #45a049;
-        }
-        .reset-button {
-            display: block;
-            margin: 10px auto;
-            padding: 8px 20px;
-            background-color: #ff9800;
-            color: white;
-        }
-        .reset-button:hover {
-            background-color: #e68a00;
-        }
-        footer {
-            text-align: center;
-            margin-top: 30px;
-            padding-top: 20px;
-            border-top: 1px solid #e0e0e0;
-            color: #777;
-        }
-        header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin-bottom: 20px;
-            padding-bottom: 10px;
-            border-bottom: 1px solid #e0e0e0;
-        }
-        /* Add notification styles */
-        .notification {
-            position: fixed;
-            top: 20px;
-            left: 50%;
-            transform: translateX(-50%);
-            padding: 10px 20px;
-            border-radius: 5px;
-            color: white;
-            font-weight: bold;
-            z-index: 9999;
-            opacity: 0;
-            transition: opacity 0.3s;
-        }
-        .success-notification {
-            background-color: #4CAF50;
-        }
-        .error-notification {
-            background-color: #f44336;
-        }
-        /* Add joystick range control styles */
-        .joystick-range-controls {
-            margin-bottom: 15px;
-            padding: 10px;
-            background-color: #f9f9f9;
-            border-radius: 5px;
-            border: 1px solid #ddd;
-        }
-        .range-control {
-            display: flex;
-            align-items: center;
-            margin-bottom: 8px;
-        }
-        .range-control label {
-            width: 120px;
-            font-weight: 500;
-        }
-        .range-control input {
-            flex: 1;
-            padding: 6px 10px;
-            border: 1px solid #ddd;
-            border-radius: 4px;
-            font-size: 14px;
-        }
-        .range-button {
-            padding: 5px 10px;
-            margin-top: 5px;
-            background-color: #3498db;
-            font-size: 12px;
-        }
-        .range-button:hover {
-            background-color: #2980b9;
-        }
-    </style>
-</head>
-<body>
-    <header>
-        <h1>PID Controller Dashboard</h1>
-        <div class="status">Status: <span id="connection-status" class="status-indicator">Connected</span></div>
-    </header>
+def save_target_angle(angle, quiet=False):
+    """
+    Store angle as target_angle (not SETPOINT) in the config file.
     
-    <!-- Add notification element -->
-    <div id="notification" class="notification"></div>
+    Returns:
+        bool: True if the config was saved
+    """
+    # Hold the lock from load to save so a PID update saved in between is
+    # not overwritten with the old gains
+    with config_lock:
+        config = safe_load_config()
+        config['target_angle'] = angle
+        return safe_save_config(config, quiet=quiet)
+
+def config_writer():
+    """
+    Persist target angle changes off the Socket.IO handler threads.
     
-    <div class="chart-container">
-        <h2>Angle Data</h2>
-        <canvas id="angleChart"></canvas>
-    </div>
+    Joystick drags stream target updates, so only the most recent pending
+    angle is written each time the queue is drained. Every save goes through
+    here, in order, so an older streamed angle never overwrites a newer
+    acknowledged one.
     
-    <div class="chart-controls">
-        <button id="reset-zoom">Reset Zoom</button>
-    </div>
+    Runs for the life of the process: the Socket.IO server keeps handling
+    target updates after stop_server(), and those still need saving.
+    """
+    while True:
+        saves = [target_angle_saves.get()]
+        try:
+            while True:
+                saves.append(target_angle_saves.get_nowait())
+        except queue.Empty:
+            pass
+        
+        # Earlier angles are superseded by the newest one, so its result
+        # answers every acknowledged update in the batch. Streamed-only
+        # batches are saved quietly, as they arrive many times a second.
+        replies = [reply for _, reply in saves if reply is not None]
+        success = save_target_angle(saves[-1][0], quiet=not replies)
+        for reply in replies:
+            reply.put(success)
+
+def record_history(row):
+    """
+    Append one sample (ordered as HISTORY_FIELDS) to the history ring buffer.
     
-    <div class="pid-chart-container">
-        <h2>PID Components</h2>
-        <canvas id="pidComponentsChart"></canvas>
-    </div>
+    Only the balance loop calls this, so no lock is needed: the row is
+    written first and history_total is bumped afterwards to publish it.
+    """
+    global history_total
+    history[history_total % HISTORY_RING] = row
+    history_total += 1
+
+def get_history_since(seen):
+    """
+    Return the samples recorded after the first `seen` ones.
     
-    <div class="control-panel">
-        <div class="pid-controls">
-            <h2>PID Parameters</h2>
-            <div class="pid-parameter">
-                <label for="p-gain">P Gain:</label>
-                <input type="number" id="p-gain" value="{{ p_gain }}" step="0.1" min="0" max="20">
-            </div>
-            <div class="pid-parameter">
-                <label for="i-gain">I Gain:</label>
-                <input type="number" id="i-gain" value="{{ i_gain }}" step="0.05" min="0" max="5">
-            </div>
-            <div class="pid-parameter">
-                <label for="d-gain">D Gain:</label>
-                <input type="number" id="d-gain" value="{{ d_gain }}" step="0.1" min="0" max="10">
-            </div>
-            <button id="update-pid" class="action-button">Update PID Parameters</button>
-        </div>
-
-        <div class="target-controls">
-            <h2>Target Angle Control</h2>
-            <div class="target-angle-display">
-                <span>Current Target Angle: <span id="current-target">{{ target_angle }}</span>°</span>
-            </div>
-            
-            <!-- Joystick range controls -->
-            <div class="joystick-range-controls">
-                <div class="range-control">
-                    <label for="joystick-min">Joystick Min (°):</label>
-                    <input type="number" id="joystick-min" value="-1.5" step="0.5" min="-10" max="0">
-                </div>
-                <div class="range-control">
-                    <label for="joystick-max">Joystick Max (°):</label>
-                    <input type="number" id="joystick-max" value="1.5" step="0.5" min="0" max="10">
-                </div>
-                <div class="range-control">
-                    <label for="joystick-middle">Joystick Middle (°):</label>
-                    <input type="number" id="joystick-middle" value="0" step="0.5" min="-5" max="5">
-                </div>
-                <button id="update-joystick-range" class="range-button">Update Range</button>
-            </div>
-            
-            <!-- Joystick control for direction -->
-            <div class="joystick-container" id="joystick">
-                <div class="joystick-background"></div>
-                <div class="joystick-horizontal-line"></div>
-                <div class="joystick-vertical-line"></div>
-                <div class="joystick-knob" id="joystick-knob"></div>
-                <div class="joystick-center"></div>
-            </div>
-            
-            <button id="reset-target" class="reset-button">Reset Target Angle</button>
-            
-            <div class="manual-target">
-                <label for="target-angle">Set Target Angle:</label>
-                <input type="number" id="target-angle" value="{{ target_angle }}" step="0.5" min="-5" max="5">
-                <button id="set-target" class="action-button">Set</button>
-            </div>
-        </div>
-    </div>
+    Returns:
+        tuple: (rows oldest first as a (count, fields) array, new total to
+        pass next time). At most HISTORY_LENGTH rows are returned; anything
+        older has already been overwritten.
+    """
+    while True:
+        total = history_total
+        first = max(seen, total - HISTORY_LENGTH, 0)
+        start = first % HISTORY_RING
+        end = total % HISTORY_RING
+        if start <= end:
+            rows = history[start:end].copy()
+        else:
+            rows = np.concatenate((history[start:], history[:end]))
+        # Retry if the producer got far enough ahead to reuse the slot
+        # of the oldest copied sample while we were copying
+        if history_total - first <= HISTORY_LENGTH:
+            return rows, total
+
+def encode_frame(rows):
+    """
+    Encode (count, fields) sample rows as one binary telemetry frame.
     
-    <footer>
-        <p>Self-Balancing Robot Control System</p>
-    </footer>
+    Field-major, so the client reads each field as one contiguous run: the
+    time column as float64 (float32 steps grow to 0.0625 s after about 12
+    days of uptime), then every other field as a float32 column.
+    """
+    return rows[:, 0].tobytes() + rows[:, 1:].T.astype(np.float32).tobytes()
+
+def get_history_bytes(field_count=len(HISTORY_FIELDS)):
+    """
+    Return the buffered samples, oldest first, as an encode_frame() frame
+    of the first field_count fields for the 'history' reply.
     
-    <script>
-        // Add notification function
-        function showNotification(message, isSuccess) {
-            const notification = document.getElementById('notification');
-            notification.textContent = message;
-            notification.className = 'notification ' + (isSuccess ? 'success-notification' : 'error-notification');
-            notification.style.opacity = 1;
-            
-            setTimeout(() => {
-                notification.style.opacity = 0;
-            }, 3000);
-        }
+    The bytes are cached until the next sample is recorded, so several
+    dashboards (re)connecting at once share one serialization.
+    """
+    cached_total, data = history_bytes_cache.get(field_count, (-1, b''))
+    if cached_total != history_total:
+        rows, cached_total = get_history_since(0)
+        data = encode_frame(rows[:, :field_count])
+        history_bytes_cache[field_count] = (cached_total, data)
+    return data
 
-        // Connect to Socket.IO server with reconnection options
-        const socket = io({
-            reconnection: true,
-            reconnectionAttempts: 5,
-            reconnectionDelay: 1000,
-            reconnectionDelayMax: 5000,
-            timeout: 20000
-        });
-        
-        // Data arrays for angle chart
-        const maxDataPoints = 100;
-        const timeData = [];
-        const angleData = [];
-        const targetData = [];
-        const outputData = [];
-        
-        // Data arrays for PID components chart
-        const pidTimeData = [];
-        const pTermData = [];
-        const iTermData = [];
-        const dTermData = [];
-        
-        // Initialize time counter
-        let timeCounter = 0;
-        
-        // Throttle control to prevent too many updates
-        let lastTargetUpdate = 0;
-        const TARGET_UPDATE_INTERVAL = 100; // ms
-        
-        // Connection status management
-        socket.on('connect', function() {
-            document.getElementById('connection-status').textContent = 'Connected';
-            document.getElementById('connection-status').style.backgroundColor = '#4CAF50';
-            showNotification('Connected to server', true);
-        });
-        
-        socket.on('disconnect', function() {
-            document.getElementById('connection-status').textContent = 'Disconnected';
-            document.getElementById('connection-status').style.backgroundColor = '#f44336';
-            showNotification('Disconnected from server - attempting to reconnect...', false);
-        });
-        
-        socket.on('reconnect', function(attemptNumber) {
-            showNotification('Reconnected to server after ' + attemptNumber + ' attempts', true);
-        });
-        
-        socket.on('reconnect_failed', function() {
-            showNotification('Failed to reconnect to server after multiple attempts', false);
-        });
-        
-        socket.on('error', function(error) {
-            showNotification('Connection error: ' + error, false);
-        });
-        
-        // Create angle chart
-        const ctx = document.getElementById('angleChart').getContext('2d');
-        const angleChart = new Chart(ctx, {
-            type: 'line',
-            data: {
-                labels: timeData,
-                datasets: [
-                    {
-                        label: 'Actual Angle',
-                        data: angleData,
-                        borderColor: 'rgb(75, 192, 192)',
-                        borderWidth: 2,
-                        fill: false,
-                        tension: 0.4, // Increased for smoother curves
-                        pointRadius: 0 // No points, just lines
-                    },
-                    {
-                        label: 'Target Angle',
-                        data: targetData,
-                        borderColor: 'rgb(255, 99, 132)',
-                        borderWidth: 2,
-                        borderDash: [5, 5],
-                        fill: false,
-                        tension: 0,
-                        pointRadius: 0, // No points, just lines
-                        spanGaps: true // Connect the line across any null values
-                    },
-                    {
-                        label: 'PID Output',
-                        data: outputData,
-                        borderColor: 'rgb(255, 159, 64)',
-                        borderWidth: 2,
-                        fill: false,
-                        tension: 0.4, // Increased for smoother curves
-                        pointRadius: 0 // No points, just lines
-                    }
-                ]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    x: {
-                        title: {
-                            display: true,
-                            text: 'Time (s)'
-                        }
-                    },
-                    y: {
-                        title: {
-                            display: true,
-                            text: 'Angle (degrees)'
-                        }
-                    }
-                },
-                animation: {
-                    duration: 0 // No animation for real-time updates
-                },
-                plugins: {
-                    zoom: {
-                        pan: {
-                            enabled: true,
-                            mode: 'xy'
-                        },
-                        zoom: {
-                            wheel: {
-                                enabled: true
-                            },
-                            pinch: {
-                                enabled: true
-                            },
-                            mode: 'xy'
-                        }
-                    }
-                }
-            }
-        });
-        
-        // Create PID components chart
-        const pidCtx = document.getElementById('pidComponentsChart').getContext('2d');
-        const pidChart = new Chart(pidCtx, {
-            type: 'line',
-            data: {
-                labels: pidTimeData,
-                datasets: [
-                    {
-                        label: 'P Term',
-                        data: pTermData,
-                        borderColor: 'rgb(255, 99, 132)',
-                        borderWidth: 2,
-                        fill: false,
-                        tension: 0.3, // Smoother curves
-                        pointRadius: 0 // No points
-                    },
-                    {
-                        label: 'I Term',
-                        data: iTermData,
-                        borderColor: 'rgb(54, 162, 235)',
-                        borderWidth: 2,
-                        fill: false,
-                        tension: 0.3, // Smoother curves
-                        pointRadius: 0 // No points
-                    },
-                    {
-                        label: 'D Term',
-                        data: dTermData,
-                        borderColor: 'rgb(255, 206, 86)',
-                        borderWidth: 2,
-                        fill: false,
-                        tension: 0.3, // Smoother curves
-                        pointRadius: 0 // No points
-                    },
-                    {
-                        label: 'Zero Line',
-                        data: Array(pidTimeData.length).fill(0), // Create an array of zeros
-                        borderColor: 'rgba(100, 100, 100, 0.5)', // Gray, semi-transparent
-                        borderWidth: 1,
-                        borderDash: [5, 5], // Dotted line
-                        fill: false,
-                        tension: 0,
-                        pointRadius: 0,
-                        order: 4 // Draw below other datasets
-                    }
-                ]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    x: {
-                        title: {
-                            display: true,
-                            text: 'Time (s)'
-                        }
-                    },
-                    y: {
-                        title: {
-                            display: true,
-                            text: 'PID Terms'
-                        }
-                    }
-                },
-                plugins: {
-                    legend: {
-                        labels: {
-                            filter: function(item, chart) {
-                                // Don't show Zero Line in legend
-                                return item.text !== 'Zero Line';
-                            }
-                        }
-                    }
-                },
-                animation: {
-                    duration: 0 // No animation for real-time updates
-                }
-            }
-        });
-        
-        // Reset zoom button
-        document.getElementById('reset-zoom').addEventListener('click', function() {
-            angleChart.resetZoom();
-        });
-        
-        // Update PID parameters button
-        document.getElementById('update-pid').addEventListener('click', function() {
-            const pGain = parseFloat(document.getElementById('p-gain').value);
-            const iGain = parseFloat(document.getElementById('i-gain').value);
-            const dGain = parseFloat(document.getElementById('d-gain').value);
-            
-            // Disable the button during update
-            const button = document.getElementById('update-pid');
-            button.disabled = true;
-            button.textContent = 'Updating...';
-            
-            // Send PID parameter update to server
-            socket.emit('update_pid', {
-                p_gain: pGain,
-                i_gain: iGain,
-                d_gain: dGain
-            }, function(response) {
-                // Re-enable button with feedback
-                button.disabled = false;
-                if (response && response.success) {
-                    button.textContent = 'Updated!';
-                    showNotification('PID Parameters Updated Successfully!', true);
-                    setTimeout(() => {
-                        button.textContent = 'Update PID Parameters';
-                    }, 1500);
-                } else {
-                    button.textContent = 'Update Failed';
-                    showNotification('Failed to update PID parameters: ' + (response && response.error ? response.error : 'Unknown error'), false);
-                    setTimeout(() => {
-                        button.textContent = 'Update PID Parameters';
-                    }, 1500);
-                }
-            });
-        });
-        
-        // Joystick control
-        const joystick = document.getElementById('joystick');
-        const knob = document.getElementById('joystick-knob');
-        let isDragging = false;
-        let centerX = joystick.offsetWidth / 2;
-        let centerY = joystick.offsetHeight / 2;
-        const radius = joystick.offsetWidth / 2 - knob.offsetWidth / 2;
-        
-        // Joystick range settings (default values)
-        let joystickMinAngle = -1.5;
-        let joystickMaxAngle = 1.5;
-        let joystickMiddleAngle = 0;
-        
-        // Update joystick range from inputs
-        document.getElementById('update-joystick-range').addEventListener('click', function() {
-            const minValue = parseFloat(document.getElementById('joystick-min').value);
-            const maxValue = parseFloat(document.getElementById('joystick-max').value);
-            const middleValue = parseFloat(document.getElementById('joystick-middle').value);
-            
-            // Validate inputs
-            if (isNaN(minValue) || isNaN(maxValue) || isNaN(middleValue)) {
-                showNotification('Please enter valid numbers for all values', false);
-                return;
-            }
-            
-            if (minValue >= maxValue) {
-                showNotification('Min value must be less than max value', false);
-                return;
-            }
-            
-            if (middleValue < minValue || middleValue > maxValue) {
-                showNotification('Middle value must be between min and max values', false);
-                return;
-            }
-            
-            // Update joystick range
-            joystickMinAngle = minValue;
-            joystickMaxAngle = maxValue;
-            joystickMiddleAngle = middleValue;
-            
-            showNotification(`Joystick range updated: ${joystickMinAngle}° to ${joystickMaxAngle}°, middle: ${joystickMiddleAngle}°`, true);
-        });
-        
-        // Initialize knob at center
-        knob.style.left = `${centerX}px`;
-        knob.style.top = `${centerY}px`;
-        
-        // Handle joystick events
-        joystick.addEventListener('mousedown', startDrag);
-        joystick.addEventListener('touchstart', startDrag);
-        document.addEventListener('mousemove', drag);
-        document.addEventListener('touchmove', drag);
-        document.addEventListener('mouseup', endDrag);
-        document.addEventListener('touchend', endDrag);
-        
-        function startDrag(e) {
-            isDragging = true;
-            drag(e);
-        }
-        
-        function drag(e) {
-            if (!isDragging) return;
-            
-            e.preventDefault();
-            
-            // Get position
-            let clientX, clientY;
-            if (e.type.startsWith('touch')) {
-                clientX = e.touches[0].clientX;
-                clientY = e.touches[0].clientY;
-            } else {
-                clientX = e.clientX;
-                clientY = e.clientY;
-            }
-            
-            // Get joystick position
-            const rect = joystick.getBoundingClientRect();
-            const joystickX = clientX - rect.left;
-            const joystickY = clientY - rect.top;
-            
-            // Calculate distance from center
-            const deltaX = joystickX - centerX;
-            const deltaY = joystickY - centerY;
-            const distance = Math.sqrt(deltaX * deltaX + deltaY * deltaY);
-            
-            // Normalize to radius
-            let newX, newY;
-            if (distance > radius) {
-                // Limit to the edge of the joystick
-                const angle = Math.atan2(deltaY, deltaX);
-                newX = centerX + radius * Math.cos(angle);
-                newY = centerY + radius * Math.sin(angle);
-            } else {
-                newX = joystickX;
-                newY = joystickY;
-            }
-            
-            // Update knob position
-            knob.style.left = `${newX}px`;
-            knob.style.top = `${newY}px`;
-            
-            // Calculate angle control value (only using Y-axis)
-            // Map from -1 to 1 based on the Y position
-            const normalizedY = ((newY - centerY) / radius) * -1;
-            
-            // Map the normalized Y position to the angle range:
-            // When normalizedY is -1, output should be joystickMinAngle
-            // When normalizedY is 0, output should be joystickMiddleAngle
-            // When normalizedY is 1, output should be joystickMaxAngle
-            let mappedAngle;
-            if (normalizedY >= 0) {
-                // Map from 0 to 1 to middleAngle to maxAngle
-                mappedAngle = joystickMiddleAngle + normalizedY * (joystickMaxAngle - joystickMiddleAngle);
-            } else {
-                // Map from -1 to 0 to minAngle to middleAngle
-                mappedAngle = joystickMiddleAngle + normalizedY * (joystickMiddleAngle - joystickMinAngle);
-            }
-            
-            // Calculate X-axis value for wheel differential control
-            // Normalize to -1 to 1 for wheel differential
-            const normalizedX = ((newX - centerX) / radius);
-            
-            // Update target angle if enough time has passed
-            const now = Date.now();
-            if (now - lastTargetUpdate > TARGET_UPDATE_INTERVAL) {
-                updateTargetAngle(mappedAngle, true);
-                
-                // Send wheel differential command based on X-axis
-                updateWheelDifferential(normalizedX);
-                
-                lastTargetUpdate = now;
-            }
-        }
-        
-        function endDrag() {
-            if (!isDragging) return;
-            isDragging = false;
-            
-            // Animate back to center
-            knob.style.transition = 'left 0.2s, top 0.2s';
-            knob.style.left = `${centerX}px`;
-            knob.style.top = `${centerY}px`;
-            
-            // Reset transition after animation
-            setTimeout(() => {
-                knob.style.transition = '';
-            }, 200);
-            
-            // Reset target angle to the middle value instead of 0
-            updateTargetAngle(joystickMiddleAngle, true);
-            
-            // Reset wheel differential
-            updateWheelDifferential(0);
-        }
-        
-        // Function to update wheel differential based on joystick X position
-        function updateWheelDifferential(xValue) {
-            // Only apply differential if significant movement
-            if (Math.abs(xValue) < 0.05) {
-                xValue = 0;
-            }
-            
-            // Send wheel differential command to server
-            socket.emit('update_wheel_differential', {
-                value: xValue
-            }, function(response) {
-                if (response && !response.success) {
-                    showNotification('Failed to update wheel differential: ' + 
-                        (response.error ? response.error : 'Unknown error'), false);
-                }
-            });
-        }
-        
-        // Reset target angle button
-        document.getElementById('reset-target').addEventListener('click', function() {
-            updateTargetAngle(joystickMiddleAngle, true);
-        });
-        
-        document.getElementById('set-target').addEventListener('click', function() {
-            const targetAngle = parseFloat(document.getElementById('target-angle').value);
-            updateTargetAngle(targetAngle);
-        });
-        
-        function updateTargetAngle(angle, fromJoystick = false) {
-            // Limit angle based on source: joystick or manual input (-5 to 5 degrees)
-            if (fromJoystick) {
-                // Use the custom range for joystick
-                angle = Math.max(joystickMinAngle, Math.min(joystickMaxAngle, angle));
-            } else {
-                // Keep the manual range as before
-                angle = Math.max(-5, Math.min(5, angle));
-            }
-            
-            // Round to 1 decimal place for display
-            const roundedAngle = Math.round(angle * 10) / 10;
-            
-            // Update input field
-            document.getElementById('target-angle').value = roundedAngle.toFixed(1);
-            
-            // Send target angle update to server
-            socket.emit('update_target_angle', {
-                angle: roundedAngle
-            }, function(response) {
-                if (response && response.success) {
-                    showNotification('Target angle updated to ' + roundedAngle.toFixed(1) + '°', true);
-                } else {
-                    showNotification('Failed to update target angle: ' + (response && response.error ? response.error : 'Unknown error'), false);
-                }
-            });
-        }
-        
-        // Handle incoming data
-        socket.on('update_data', function(data) {
-            // Update target angle display
-            document.getElementById('current-target').textContent = data.target_angle.toFixed(1);
-            
-            // Add new data to angle chart
-            timeCounter += 0.05;  // 20Hz updates (double the previous rate)
-            timeData.push(timeCounter.toFixed(1));
-            angleData.push(data.angle);
-            
-            // For target, use a fixed value rather than a time series
-            // This creates a straight dotted line across the chart
-            targetData.push(data.target_angle);
-            
-            // Scale output to fit better with angle scale
-            outputData.push(data.output / 10);
-            
-            // Add new data to PID components chart
-            pidTimeData.push(timeCounter.toFixed(1));
-            pTermData.push(data.pid.p_term);
-            iTermData.push(data.pid.i_term);
-            dTermData.push(data.pid.d_term);
-            
-            // Ensure zero line dataset has same number of points
-            if (pidChart.data.datasets[3]) {
-                pidChart.data.datasets[3].data.push(0);
-            }
-            
-            // Remove old data if we have too many points
-            if (timeData.length > maxDataPoints) {
-                timeData.shift();
-                angleData.shift();
-                targetData.shift();
-                outputData.shift();
-                
-                pidTimeData.shift();
-                pTermData.shift();
-                iTermData.shift();
-                dTermData.shift();
-                
-                // Keep zero line dataset in sync
-                if (pidChart.data.datasets[3]) {
-                    pidChart.data.datasets[3].data.shift();
-                }
-            }
-            
-            // Update charts without animation for smooth real-time display
-            angleChart.update('none');
-            pidChart.update('none');
-        });
-        
-        // Handle PID parameter updates
-        socket.on('pid_updated', function(data) {
-            document.getElementById('p-gain').value = data.p_gain;
-            document.getElementById('i-gain').value = data.i_gain;
-            document.getElementById('d-gain').value = data.d_gain;
-        });
-        
-        // Handle window resize to update joystick dimensions
-        window.addEventListener('resize', function() {
-            centerX = joystick.offsetWidth / 2;
-            centerY = joystick.offsetHeight / 2;
-            knob.style.left = `${centerX}px`;
-            knob.style.top = `${centerY}px`;
-        });
-        
-        // Send a message to request any available data immediately
-        socket.emit('request_initial_data');
-    </script>
-</body>
-</html>
-"""
+# The dashboard page lives in templates/dashboard.html; compile it once
+# instead of on every page load
+DASHBOARD_TEMPLATE = 'dashboard.html'
+dashboard_template = app.jinja_env.get_template(DASHBOARD_TEMPLATE)
+
+# Template version, part of the dashboard page ETag
+with open(os.path.join(app.root_path, app.template_folder, DASHBOARD_TEMPLATE), 'rb') as template_file:
+    TEMPLATE_HASH = hashlib.sha1(template_file.read()).hexdigest()[:12]
+
+# Rendered dashboard pages keyed on the values embedded in them
+# (p_gain, i_gain, d_gain, target_angle); cleared whenever the config is saved
+_html_cache = {}
+
+def vendor_version(filename):
+    """Return a content hash of a vendored script, or '' if it is absent."""
+    try:
+        with open(os.path.join(app.static_folder, 'vendor', filename), 'rb') as script:
+            return hashlib.sha1(script.read()).hexdigest()[:12]
+    except OSError:
+        return ''
+
+# Content hash of each vendored script under static/vendor, computed once at
+# startup instead of stat()ing on every page render (restart to pick up new
+# files), and one hash of them all for the dashboard page ETag
+_vendor_versions = {filename: vendor_version(filename) for filename in VENDOR_SCRIPTS}
+VENDOR_HASH = hashlib.sha1(
+    ','.join(_vendor_versions[filename] for filename in VENDOR_SCRIPTS).encode()
+).hexdigest()[:12]
+
+def vendor_url(filename):
+    """Return the local static URL for a vendored script, or its CDN URL."""
+    version = _vendor_versions[filename]
+    if version:
+        # The ?v= hash changes with the file, so it can be cached as immutable
+        return url_for('static', filename='vendor/' + filename, v=version)
+    return VENDOR_SCRIPTS[filename]
+
+@app.context_processor
+def inject_vendor_url():
+    """Make vendor_url available to the dashboard template."""
+    return {'vendor_url': vendor_url}
+
+@app.after_request
+def add_cache_headers(response):
+    """Let browsers cache vendored scripts for good (their URLs carry a content hash)."""
+    if request.path.startswith('/static/vendor/'):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+def matching_etag(etag):
+    """
+    Return the If-None-Match tag that refers to etag, or None.
+    
+    Flask-Compress appends ':<encoding>' to the ETag of compressed responses,
+    so that is what browsers send back; those tags match with the suffix
+    stripped.
+    """
+    if request.if_none_match.star_tag:
+        return etag
+    # Weak comparison, as for any If-None-Match
+    for tag in request.if_none_match.as_set(include_weak=True):
+        if tag == etag or tag.rsplit(':', 1)[0] == etag:
+            return tag
+    return None
 
 @app.route('/')
 def index():
@@ -1019,21 +449,49 @@ def index():
     
     # Use target_angle if it exists, otherwise fall back to SETPOINT
     target_angle = config.get('target_angle', config.get('SETPOINT', 0))
+    p_gain = config.get('P_GAIN', 0)
+    i_gain = config.get('I_GAIN', 0)
+    d_gain = config.get('D_GAIN', 0)
     
-    return render_template_string(HTML_TEMPLATE, 
-                                 p_gain=config.get('P_GAIN', 0),
-                                 i_gain=config.get('I_GAIN', 0),
-                                 d_gain=config.get('D_GAIN', 0),
-                                 target_angle=target_angle)
+    # The page only changes with the template, the vendored script URLs and
+    # the values embedded in it, so a matching ETag (compressed or not) gets
+    # a 304 before the page is looked up or compressed again
+    etag = f"{TEMPLATE_HASH}-{VENDOR_HASH}-{p_gain}-{i_gain}-{d_gain}-{target_angle}"
+    cached_etag = matching_etag(etag)
+    if cached_etag is not None:
+        response = make_response('', 304)
+        etag = cached_etag
+    else:
+        key = (p_gain, i_gain, d_gain, target_angle)
+        html = _html_cache.get(key)
+        if html is None:
+            html = render_template(dashboard_template,
+                                   p_gain=p_gain,
+                                   i_gain=i_gain,
+                                   d_gain=d_gain,
+                                   target_angle=target_angle)
+            _html_cache[key] = html
+        response = make_response(html)
+    response.set_etag(etag)
+    # Values embedded in a briefly stale page are refreshed over Socket.IO
+    # (pid_updated / update_data) as soon as it connects
+    response.headers['Cache-Control'] = 'public, max-age=300, must-revalidate'
+    return response
 
 @socketio.on('connect')
 def handle_connect(auth=None):
     """Handle client connection."""
-    # Send current data to newly connected client
-    data_to_send = convert_numpy_to_python(latest_data)
-    socketio.emit('update_data', data_to_send, to=request.sid)
+    connected_clients.add(request.sid)
+    
+    room = request.args.get('sub', 'full')
+    if room not in TELEMETRY_ROOMS:
+        room = 'full'
+    join_room(room)
+    telemetry_subscribers[room].add(request.sid)
     
-    # Also send current PID parameters
+    # Telemetry is not sent here: the next send_data tick broadcasts it and
+    # the page requests its history right after connecting. Only the PID
+    # parameters, which are not part of the periodic stream, are sent.
     config = safe_load_config()
     socketio.emit('pid_updated', {
         'p_gain': config.get('P_GAIN', 0),
@@ -1041,11 +499,30 @@ def handle_connect(auth=None):
         'd_gain': config.get('D_GAIN', 0)
     }, to=request.sid)
 
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Handle client disconnection."""
+    connected_clients.discard(request.sid)
+    for subscribers in telemetry_subscribers.values():
+        subscribers.discard(request.sid)
+
 @socketio.on('request_initial_data')
 def handle_initial_data_request():
     """Send initial data when requested by client."""
-    data_to_send = convert_numpy_to_python(latest_data)
-    socketio.emit('update_data', data_to_send)
+    socketio.emit('update_data', telemetry_payload(), to=request.sid)
+
+@socketio.on('request_history')
+def handle_history_request():
+    """Send the buffered telemetry history as a single binary frame."""
+    # Same fields as the requester's update_batch frames
+    if request.sid in telemetry_subscribers['angle']:
+        field_count = ANGLE_FIELD_COUNT
+    else:
+        field_count = len(HISTORY_FIELDS)
+    socketio.emit('history', {
+        'fields': HISTORY_FIELDS[:field_count],
+        'data': get_history_bytes(field_count)
+    }, to=request.sid)
 
 @socketio.on('update_pid')
 def handle_pid_update(data):
@@ -1054,21 +531,23 @@ def handle_pid_update(data):
         # Print received data for debugging
         print(f"Received PID update request: {data}")
         
-        # Update config
-        config = safe_load_config()
-        print(f"Current config before update: P={config.get('P_GAIN')}, I={config.get('I_GAIN')}, D={config.get('D_GAIN')}")
-        
-        if 'p_gain' in data:
-            config['P_GAIN'] = float(data['p_gain'])
-        if 'i_gain' in data:
-            config['I_GAIN'] = float(data['i_gain'])
-        if 'd_gain' in data:
-            config['D_GAIN'] = float(data['d_gain'])
-        
-        print(f"Updated config values: P={config.get('P_GAIN')}, I={config.get('I_GAIN')}, D={config.get('D_GAIN')}")
-        
-        # Save config
-        success = safe_save_config(config)
+        # Update config, holding the lock from load to save so a concurrent
+        # target angle save is not overwritten with the old angle
+        with config_lock:
+            config = safe_load_config()
+            print(f"Current config before update: P={config.get('P_GAIN')}, I={config.get('I_GAIN')}, D={config.get('D_GAIN')}")
+            
+            if 'p_gain' in data:
+                config['P_GAIN'] = float(data['p_gain'])
+            if 'i_gain' in data:
+                config['I_GAIN'] = float(data['i_gain'])
+            if 'd_gain' in data:
+                config['D_GAIN'] = float(data['d_gain'])
+            
+            print(f"Updated config values: P={config.get('P_GAIN')}, I={config.get('I_GAIN')}, D={config.get('D_GAIN')}")
+            
+            # Save config
+            success = safe_save_config(config)
         
         # Broadcast the updated parameters to all clients if saved successfully
         if success:
@@ -1091,23 +570,35 @@ def handle_pid_update(data):
 @socketio.on('update_target_angle')
 def handle_target_angle_update(data):
     """Handle target angle update."""
+    global latest_sample
     try:
-        # Update config
         angle = float(data['angle'])
-        config = safe_load_config()
-        # Use target_angle instead of SETPOINT to match the config file
-        config['target_angle'] = angle
-        success = safe_save_config(config)
         
         # Update latest data
         latest_data['target_angle'] = angle
+        latest_sample = latest_sample[:2] + (angle,) + latest_sample[3:]
+        data_ready.set()
+        
+        if data.get('stream'):
+            # Joystick drags stream updates without an acknowledgement, so
+            # don't wait for config_writer to save them
+            target_angle_saves.put((angle, None))
+            if DEBUG_JOYSTICK:
+                print(f"✅ Target angle updated to: {angle}")
+            return {'success': True}
         
+        # The balance loop reads its setpoint from the file, so only report
+        # success once the new angle is actually saved
+        reply = queue.Queue()
+        target_angle_saves.put((angle, reply))
+        try:
+            success = reply.get(timeout=TARGET_SAVE_TIMEOUT)
+        except queue.Empty:
+            return {'success': False, 'error': 'Timed out saving target angle'}
         if success:
             print(f"✅ Target angle updated to: {angle}")
             return {'success': True}
-        else:
-            print(f"❌ Failed to update target angle to: {angle}")
-            return {'success': False, 'error': 'Failed to save configuration'}
+        return {'success': False, 'error': 'Could not save target angle'}
     except Exception as e:
         print(f"❌ Error updating target angle: {e}, Type: {type(e)}")
         import traceback
@@ -1151,155 +642,334 @@ def handle_wheel_differential(data):
         latest_data['left_wheel_power'] = left_power
         latest_data['right_wheel_power'] = right_power
         
-        print(f"🎮 Wheel differential: x={x_value:.2f}, L={left_power:.1f}, R={right_power:.1f}")
+        if DEBUG_JOYSTICK:
+            print(f"🎮 Wheel differential: x={x_value:.2f}, L={left_power:.1f}, R={right_power:.1f}")
         
         return {'success': True}
     except Exception as e:
         print(f"❌ Error updating wheel differential: {e}")
         return {'success': False, 'error': str(e)}
 
+def telemetry_payload():
+    """Return the part of latest_data sent to clients as update_data."""
+    return {key: latest_data[key] for key in _EMIT_KEYS}
+
+def telemetry_changed(values):
+    """Return True if any value differs noticeably from the last queued tick."""
+    if telemetry_last_values is None:
+        return True
+    for new, old in zip(values, telemetry_last_values):
+        if abs(new - old) > TELEMETRY_EPSILON:
+            return True
+    return False
+
+def queue_telemetry(sample):
+    """Add one sample (ordered as HISTORY_FIELDS) to the pending batch."""
+    global telemetry_last_values
+    telemetry_pending.append(sample)
+    telemetry_last_values = sample[1:]
+
+def flush_telemetry():
+    """Emit the queued telemetry samples as one binary message."""
+    global telemetry_last_emit
+    if telemetry_pending:
+        # The angle-only frame is just the leading fields.
+        # A room emit is encoded into one packet and the same frames are sent
+        # to every member (python-socketio >= 5.8), so extra dashboards do
+        # not add encoding work.
+        rows = np.array(telemetry_pending, dtype=np.float64)
+        if telemetry_subscribers['full']:
+            socketio.emit('update_batch', encode_frame(rows), to='full')
+        if telemetry_subscribers['angle']:
+            socketio.emit('update_batch', encode_frame(rows[:, :ANGLE_FIELD_COUNT]), to='angle')
+        telemetry_pending.clear()
+        telemetry_last_emit = time.monotonic()
+
 def send_data():
     """Send data to clients periodically."""
     global server_running
     
-    # Initial data point
-    initial_config = safe_load_config()
-    latest_data['target_angle'] = initial_config.get('target_angle', 0.0)  # Use target_angle instead of SETPOINT
-    data_to_send = convert_numpy_to_python(latest_data)
-    socketio.emit('update_data', data_to_send)
+    # Initial data point (target_angle is seeded by start_server and kept
+    # current by handle_target_angle_update, so no config reads in here)
+    socketio.emit('update_data', telemetry_payload())
+    
+    # Samples recorded before now reach clients through request_history
+    seen = history_total
+    # The last published sample handled; target angle changes republish it
+    # without recording a new history row
+    last_sample = latest_sample
+    # Ticks since the oldest pending sample was queued
+    pending_ticks = 0
+    
+    # Functions called every tick, bound once (local lookups are cheaper
+    # than module global + attribute lookups on the Pi)
+    wait_for_data = data_ready.wait
+    clear_data_ready = data_ready.clear
+    history_since = get_history_since
+    changed = telemetry_changed
+    enqueue = queue_telemetry
+    flush = flush_telemetry
+    monotonic = time.monotonic
+    sleep = socketio.sleep
     
+    next_tick = monotonic()
     while server_running:
         try:
-            # Load latest config to get target angle
-            config = safe_load_config()
-            latest_data['target_angle'] = config.get('target_angle', 0.0)  # Use target_angle instead of SETPOINT
-            
-            # Convert any NumPy types to standard Python types for JSON serialization
-            data_to_send = convert_numpy_to_python(latest_data)
-            
-            # Send latest data to all clients
-            socketio.emit('update_data', data_to_send)
-            
-            # Sleep briefly
-            time.sleep(0.05)  
+            # Wait for new data instead of polling
+            wait_for_data(timeout=IDLE_EMIT_INTERVAL)
+            clear_data_ready()
+            
+            # Drain everything recorded since the last tick, so no sample is
+            # lost however fast the producer runs
+            rows, seen = history_since(seen)
+            sample = latest_sample
+            
+            if not connected_clients:
+                # Skip the encode/emit entirely when nobody is listening
+                telemetry_pending.clear()
+                pending_ticks = 0
+            else:
+                queued = 0
+                for row in rows.tolist():
+                    if changed(row[1:]):
+                        enqueue(row)
+                        queued += 1
+                if not len(rows) and sample is not last_sample and changed(sample[1:]):
+                    # Target changed while no samples are being recorded
+                    enqueue((monotonic() - history_start_time,) + sample[1:])
+                    queued += 1
+                
+                if telemetry_pending:
+                    pending_ticks += 1
+                    # Send once the batch spans TELEMETRY_BATCH_SIZE ticks, or
+                    # straight away when nothing new arrived this tick
+                    if pending_ticks >= TELEMETRY_BATCH_SIZE or not queued:
+                        flush()
+                        pending_ticks = 0
+                elif monotonic() - telemetry_last_emit >= IDLE_EMIT_INTERVAL:
+                    # Quiet link: send the current state as a heartbeat
+                    enqueue((monotonic() - history_start_time,) + sample[1:])
+                    flush()
+            last_sample = sample
+            
+            # Cap the tick rate; updates arriving meanwhile go out together.
+            # Sleep until the next deadline on a fixed EMIT_INTERVAL grid, so
+            # time spent emitting doesn't stretch the cadence; after an idle
+            # wait or a slow tick, start a new grid instead of catching up.
+            next_tick += EMIT_INTERVAL
+            delay = next_tick - monotonic()
+            if delay > 0:
+                sleep(delay)
+            else:
+                next_tick = monotonic()
         except Exception as e:
             print(f"❌ Error in send_data: {e}, Type: {type(e)}")
-            time.sleep(1)  # Sleep longer on error
+            socketio.sleep(1)  # Sleep longer on error
 
-def start_server(host='0.0.0.0', port=8080):
+def prepare_server():
     """
-    Start the web server in a background thread.
+    Seed the dashboard state and start its background tasks.
     
-    Args:
-        host: Host address to bind to
-        port: Port to listen on
+    Returns:
+        bool: False if the server is already running
     """
-    global server_running, server_thread
+    global server_running, config_writer_started
     
     if server_running:
         print("Server already running")
-        return
+        return False
     
     server_running = True
     
     # Initialize data with current config values
     config = safe_load_config()
-    latest_data['target_angle'] = config.get('target_angle', 0.0)  # Use target_angle instead of SETPOINT
+    latest_data['target_angle'] = float(config.get('target_angle', 0.0))  # Use target_angle instead of SETPOINT
+    on_config_change(config)
+    
+    # Start data sending task (a thread or green thread, matching async_mode)
+    socketio.start_background_task(send_data)
+    if not config_writer_started:
+        # Started once and never stopped, unlike send_data
+        config_writer_started = True
+        socketio.start_background_task(config_writer)
+    return True
+
+def run_server(host, port):
+    """Serve the dashboard on the current thread until the server exits."""
+    socketio.run(app,
+                 host=host,
+                 port=port,
+                 debug=False,
+                 use_reloader=False,
+                 allow_unsafe_werkzeug=True)  # For newer Flask versions
+
+def start_server(host='0.0.0.0', port=8080):
+    """
+    Start the web server in a background thread.
+    
+    Use this when the calling thread is busy with something else, such as
+    the balance loop in main.py.
     
-    # Start data sending thread
-    data_thread = threading.Thread(target=send_data, daemon=True)
-    data_thread.start()
+    Args:
+        host: Host address to bind to
+        port: Port to listen on
+    """
+    global server_thread
+    
+    if not prepare_server():
+        return
     
     # Start server in a separate thread
-    server_thread = threading.Thread(
-        target=socketio.run,
-        args=(app,),
-        kwargs={
-            'host': host, 
-            'port': port, 
-            'debug': False,
-            'use_reloader': False,
-            'allow_unsafe_werkzeug': True  # For newer Flask versions
-        }
-    )
+    server_thread = threading.Thread(target=run_server, args=(host, port))
     server_thread.daemon = True
     server_thread.start()
     print(f"Web dashboard server started on port {port}")
 
+def run_forever(host='0.0.0.0', port=8080):
+    """
+    Run the web server on the calling thread until it is interrupted.
+    
+    For processes that only serve the dashboard: no extra server thread is
+    needed and Ctrl+C reaches the server directly.
+    
+    Args:
+        host: Host address to bind to
+        port: Port to listen on
+    """
+    if not prepare_server():
+        return
+    
+    print(f"Web dashboard server running on port {port}")
+    try:
+        run_server(host, port)
+    finally:
+        stop_server()
+
 def stop_server():
     """Stop the web server."""
     global server_running
     server_running = False
+    data_ready.set()  # Wake send_data so it sees the flag promptly
     print("Web server stopping...")
 
-def update_angle_data(roll, output, angular_velocity=0):
-    """
-    Update the latest angle data.
-    
-    Args:
-        roll: Current roll angle in degrees
-        output: PID controller output
-        angular_velocity: Angular velocity in degrees per second (optional)
+def on_config_change(config):
+    """Refresh the gains used by estimate_pid_terms from a config dict."""
+    global estimate_gains
+    estimate_gains = (float(config.get('P_GAIN', 0)),
+                      float(config.get('I_GAIN', 0.1)),
+                      float(config.get('D_GAIN', 0)),
+                      float(config.get('MAX_I_TERM', 20.0)))
+
+def estimate_pid_terms(roll, angular_velocity, dt):
     """
-    global latest_data
+    Approximate the PID terms from the configured gains.
     
-    # Get PID components from PIDController if available
-    config = safe_load_config()
-    
-    # Convert any NumPy types to standard Python types
-    roll = float(roll) if roll is not None else 0.0
-    output = float(output) if output is not None else 0.0
-    angular_velocity = float(angular_velocity) if angular_velocity is not None else 0.0
+    Only used when the caller does not pass the terms computed by the real
+    PIDController (e.g. the standalone test below). The gains are cached and
+    refreshed by on_config_change() whenever the dashboard saves the config.
     
-    # Track time delta for I term calculation
-    current_time = time.time()
-    dt = current_time - latest_data.get('timestamp', current_time)
+    Returns:
+        tuple: (p_term, i_term, d_term)
+    """
+    if estimate_gains is None:
+        on_config_change(safe_load_config())
+    p_gain, i_gain, d_gain, max_i = estimate_gains
     
     # Calculate error (target - current)
     error = latest_data.get('target_angle', 0) - roll
     
     # Approximate I term by accumulating error over time (if we have a previous i_term)
     if 'pid' in latest_data and 'i_term' in latest_data['pid']:
-        # Get I gain from config
-        i_gain = config.get('I_GAIN', 0.1)
         # Calculate I term based on accumulated error
         i_term = latest_data['pid']['i_term'] + (i_gain * error * dt)
         # Apply rudimentary anti-windup (limit the I term)
-        max_i = config.get('MAX_I_TERM', 20.0)
         i_term = max(-max_i, min(i_term, max_i))
     else:
         # If no previous I term, start with a simple approximation
-        i_term = config.get('I_GAIN', 0.1) * error
+        i_term = i_gain * error
     
     # Calculate P and D terms
-    p_term = float(config.get('P_GAIN', 0) * roll)
-    d_term = float(config.get('D_GAIN', 0) * angular_velocity)
+    p_term = float(p_gain * roll)
+    d_term = float(d_gain * angular_velocity)
     
-    # Update latest data
-    latest_data.update({
-        'timestamp': current_time,
-        'angle': roll,
-        'output': output,
-        'pid': {
-            'p_term': p_term,
-            'i_term': i_term,
-            'd_term': d_term
-        }
-    })
+    return p_term, float(i_term), d_term
+
+def update_angle_data(roll, output, angular_velocity=0.0, p_term=None, i_term=None, d_term=None):
+    """
+    Update the latest angle data.
+    
+    Args:
+        roll: Current roll angle in degrees
+        output: PID controller output
+        angular_velocity: Angular velocity in degrees per second (optional)
+        p_term: Proportional term from the PID controller (optional)
+        i_term: Integral term from the PID controller (optional)
+        d_term: Derivative term from the PID controller (optional)
+    
+    When the PID terms are not given they are approximated from the config gains.
+    """
+    global latest_data, latest_sample
+    
+    # Convert any NumPy types to standard Python types
+    roll = float(roll)
+    output = float(output)
+    angular_velocity = float(angular_velocity)
+    
+    # Sample times come from the monotonic clock: the Pi has no RTC and
+    # steps its wall clock when NTP syncs, which would tear the chart x axis.
+    # The wall-clock timestamp is only kept for reference.
+    sample_time = time.monotonic() - history_start_time
+    
+    if p_term is None or i_term is None or d_term is None:
+        # Time delta since the previous sample, for the I term
+        dt = sample_time - latest_sample[0]
+        p_term, i_term, d_term = estimate_pid_terms(roll, angular_velocity, dt)
+    else:
+        # Use the terms the controller actually applied
+        p_term = float(p_term)
+        i_term = float(i_term)
+        d_term = float(d_term)
+    
+    # Update latest data in place (no temporary dicts at the control rate)
+    latest_data['timestamp'] = time.time()
+    latest_data['angle'] = roll
+    latest_data['output'] = output
+    pid = latest_data['pid']
+    pid['p_term'] = p_term
+    pid['i_term'] = i_term
+    pid['d_term'] = d_term
+    
+    sample = (sample_time, roll, latest_data.get('target_angle', 0),
+              output, p_term, i_term, d_term)
+    latest_sample = sample
+    record_history(sample)
+    data_ready.set()
 
 # For testing the server standalone
 if __name__ == "__main__":
-    start_server()
+    # Simulated sensor rate; raise it to stress-test the telemetry path
+    SIMULATION_RATE = 10  # Hz
+    
+    def simulate_data():
+        """Feed random telemetry to the dashboard while the server runs."""
+        rng = np.random.default_rng()
+        period = 1.0 / SIMULATION_RATE
+        next_sample = time.monotonic()
+        while True:
+            # Simulate a second of random data at a time: angle, angular
+            # velocity and output columns generated in one vectorized call
+            batch = rng.uniform((-10, -20, -100), (10, 20, 100), size=(SIMULATION_RATE, 3))
+            for angle, velocity, output in batch.tolist():
+                update_angle_data(angle, output, velocity)
+                next_sample += period
+                delay = next_sample - time.monotonic()
+                if delay > 0:
+                    socketio.sleep(delay)
+    
     print("Press Ctrl+C to stop")
+    socketio.start_background_task(simulate_data)
     try:
-        import random
-        while True:
-            # Simulate random data for testing
-            angle = random.uniform(-10, 10)
-            velocity = random.uniform(-20, 20)
-            output = random.uniform(-100, 100)
-            update_angle_data(angle, output, velocity)
-            time.sleep(0.1)
+        run_forever()
     except KeyboardInterrupt:
-        stop_server()
-        print("Server stopped") 
\ No newline at end of file
+        pass
+    print("Server stopped")